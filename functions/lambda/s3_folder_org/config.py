@@ -8,6 +8,21 @@ import os
 SOURCE_BUCKET = os.environ.get('SOURCE_BUCKET', 'important-stuff-20251106-0-018ql4')
 BATCH_SIZE = int(os.environ.get('BATCH_SIZE', '150'))
 
+# Copy Configuration
+# Number of copy_object calls kept in flight at once (I/O bound, so threads overlap latency)
+COPY_MAX_WORKERS = int(os.environ.get('COPY_MAX_WORKERS', '64'))
+# Seconds a batch folder listing is reused by a warm Lambda container.
+# Off by default: a cached listing misses files added to the folder since.
+LIST_CACHE_TTL = int(os.environ.get('LIST_CACHE_TTL', '0'))
+
+# S3 Batch Operations Configuration (bucket creator only)
+# When enabled, copies run as an S3 Batch Operations job instead of inside the Lambda
+USE_BATCH_OPERATIONS = os.environ.get('USE_BATCH_OPERATIONS', 'false').lower() == 'true'
+# IAM role assumed by S3 Batch Operations (trusts batchoperations.s3.amazonaws.com)
+BATCH_OPERATIONS_ROLE_ARN = os.environ.get('BATCH_OPERATIONS_ROLE_ARN', '')
+# Prefix in the source bucket for job manifests and failure reports
+BATCH_OPERATIONS_PREFIX = os.environ.get('BATCH_OPERATIONS_PREFIX', 's3-batch-operations/')
+
 # AWS Configuration
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 AWS_PROFILE = os.environ.get('AWS_PROFILE', 'default')
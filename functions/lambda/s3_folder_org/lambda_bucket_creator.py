@@ -1,17 +1,147 @@
 import boto3
+import io
 import json
 import time
 import random
 import string
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from urllib.parse import quote
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 import config
 
-s3_client = boto3.client('s3')
+MB = 1024 * 1024
+
+# Shared across copy threads (boto3 clients are thread-safe); the connection
+# pool must be at least as large as the worker pool or threads queue on it
+s3_client = boto3.client('s3', config=Config(max_pool_connections=max(128, config.COPY_MAX_WORKERS)))
+
+# Objects above the threshold are copied as parallel UploadPartCopy requests
+# (server-side, no data passes through Lambda), which also lifts the 5 GB
+# single copy_object limit
+transfer_config = TransferConfig(multipart_threshold=100 * MB, max_concurrency=20, use_threads=True)
+
+# Batch folder listings kept across invocations of a warm container (e.g.
+# retries): (bucket, prefix) -> (listed_at, keys)
+_LIST_CACHE = {}
 
 def generate_random_chars(length=6):
     """Generate random alphanumeric characters"""
     return ''.join(random.choices(string.ascii_lowercase + string.digits, k=length))
 
+def iter_folder_keys(bucket, prefix):
+    """Yield (key, size) for objects under a folder prefix, skipping folder markers"""
+    paginator = s3_client.get_paginator('list_objects_v2')
+
+    # StartAfter skips the folder marker object itself, if one exists
+    for page in paginator.paginate(
+        Bucket=bucket,
+        Prefix=prefix,
+        StartAfter=prefix,
+        FetchOwner=False,
+        PaginationConfig={'PageSize': 1000}
+    ):
+        for obj in page.get('Contents', ()):
+            key = obj['Key']
+
+            # Skip nested folder markers
+            if key.endswith('/'):
+                continue
+
+            yield key, obj['Size']
+
+def cached_list_keys(bucket, prefix, ttl=None):
+    """List (key, size) pairs under a prefix, reusing a listing younger than ttl seconds"""
+    ttl = config.LIST_CACHE_TTL if ttl is None else ttl
+    cache_key = (bucket, prefix)
+    now = time.time()
+
+    cached = _LIST_CACHE.get(cache_key)
+    if cached and now - cached[0] < ttl:
+        return cached[1]
+
+    keys = list(iter_folder_keys(bucket, prefix))
+    _LIST_CACHE[cache_key] = (now, keys)
+    return keys
+
+def copy_file(source_bucket, source_key, dest_bucket, dest_key, size):
+    """Copy a single object server-side and return its source key"""
+    copy_source = {'Bucket': source_bucket, 'Key': source_key}
+
+    # The listing already gave the size, so small objects (nearly every PDF)
+    # take a single CopyObject; copy() would add a HeadObject and spin up a
+    # transfer thread pool per call
+    if size < transfer_config.multipart_threshold:
+        s3_client.copy_object(
+            CopySource=copy_source,
+            Bucket=dest_bucket,
+            Key=dest_key
+        )
+    else:
+        s3_client.copy(
+            CopySource=copy_source,
+            Bucket=dest_bucket,
+            Key=dest_key,
+            Config=transfer_config
+        )
+    return source_key
+
+def submit_batch_copy_job(source_bucket, source_keys, dest_bucket, account_id, role_arn, region):
+    """
+    Copy objects with an S3 Batch Operations PutObjectCopy job.
+    S3 runs the copies on its side, so large folders are not bound by the
+    Lambda timeout. Batch Operations keeps each source key, so files land
+    under their batch folder prefix in the destination bucket.
+    Returns the job ID; the job runs asynchronously.
+    """
+    # Manifest: one "bucket,url-encoded-key" line per object
+    manifest = io.StringIO()
+    for source_key in source_keys:
+        manifest.write(f"{source_bucket},{quote(source_key)}\n")
+
+    manifest_key = f"{config.BATCH_OPERATIONS_PREFIX}{dest_bucket}/manifest.csv"
+    response = s3_client.put_object(
+        Bucket=source_bucket,
+        Key=manifest_key,
+        Body=manifest.getvalue().encode('utf-8'),
+        ContentType='text/csv'
+    )
+
+    s3control_client = boto3.client('s3control', region_name=region)
+    job = s3control_client.create_job(
+        AccountId=account_id,
+        ConfirmationRequired=False,
+        Operation={
+            'S3PutObjectCopy': {
+                'TargetResource': f"arn:aws:s3:::{dest_bucket}"
+            }
+        },
+        Manifest={
+            'Spec': {
+                'Format': 'S3BatchOperations_CSV_20180820',
+                'Fields': ['Bucket', 'Key']
+            },
+            'Location': {
+                'ObjectArn': f"arn:aws:s3:::{source_bucket}/{manifest_key}",
+                'ETag': response['ETag'].strip('"')
+            }
+        },
+        Report={
+            'Bucket': f"arn:aws:s3:::{source_bucket}",
+            'Prefix': f"{config.BATCH_OPERATIONS_PREFIX}{dest_bucket}",
+            'Format': 'Report_CSV_20180820',
+            'Enabled': True,
+            'ReportScope': 'FailedTasksOnly'
+        },
+        Priority=10,
+        RoleArn=role_arn,
+        ClientRequestToken=str(uuid.uuid4()),
+        Description=f"Copy {len(source_keys)} files to {dest_bucket}"
+    )
+    return job['JobId']
+
 def lambda_handler(event, context):
     """
     Lambda function to create new S3 buckets for each batch folder.
@@ -20,6 +150,16 @@ def lambda_handler(event, context):
     """
     source_bucket = event.get('source_bucket', config.SOURCE_BUCKET)
     region = event.get('region', config.AWS_REGION)
+    # Parsed like config.py so a string "false" in the event stays disabled
+    use_batch_operations = str(event.get('use_batch_operations', config.USE_BATCH_OPERATIONS)).lower() == 'true'
+    batch_operations_role_arn = event.get('batch_operations_role_arn', config.BATCH_OPERATIONS_ROLE_ARN)
+
+    # Fail before any bucket is created rather than inside create_job
+    if use_batch_operations and not batch_operations_role_arn:
+        return {
+            'statusCode': 400,
+            'body': json.dumps('batch_operations_role_arn (or BATCH_OPERATIONS_ROLE_ARN) is required when use_batch_operations is enabled')
+        }
 
     print(f"Starting bucket creation process for source bucket: {source_bucket}")
 
@@ -28,12 +168,16 @@ def lambda_handler(event, context):
         paginator = s3_client.get_paginator('list_objects_v2')
         batch_folders = set()
 
-        for page in paginator.paginate(Bucket=source_bucket, Delimiter='/'):
-            if 'CommonPrefixes' in page:
-                for prefix in page['CommonPrefixes']:
-                    folder_name = prefix['Prefix'].rstrip('/')
-                    if folder_name.startswith('batch-'):
-                        batch_folders.add(folder_name)
+        for page in paginator.paginate(
+            Bucket=source_bucket,
+            Delimiter='/',
+            FetchOwner=False,
+            PaginationConfig={'PageSize': 1000}
+        ):
+            for prefix in page.get('CommonPrefixes', ()):
+                folder_name = prefix['Prefix'].rstrip('/')
+                if folder_name.startswith('batch-'):
+                    batch_folders.add(folder_name)
 
         batch_folders = sorted(batch_folders, key=lambda x: int(x.split('-')[1]))
         print(f"Found {len(batch_folders)} batch folders: {batch_folders}")
@@ -69,35 +213,66 @@ def lambda_handler(event, context):
 
             # Copy all files from batch folder to new bucket
             print(f"Copying files from {batch_folder}/ to {new_bucket_name}")
+            source_objects = cached_list_keys(source_bucket, f"{batch_folder}/")
+
+            if use_batch_operations:
+                # Account ID is the 5th field of the function ARN
+                account_id = context.invoked_function_arn.split(':')[4]
+                source_keys = [source_key for source_key, _ in source_objects]
+                job_id = submit_batch_copy_job(
+                    source_bucket,
+                    source_keys,
+                    new_bucket_name,
+                    account_id,
+                    batch_operations_role_arn,
+                    region
+                )
+                print(f"Submitted S3 Batch Operations job {job_id} to copy {len(source_keys)} files to {new_bucket_name}")
+
+                created_buckets.append({
+                    'batch_folder': batch_folder,
+                    'new_bucket': new_bucket_name,
+                    'files_queued': len(source_keys),
+                    'batch_job_id': job_id
+                })
+                continue
+
+            # Copy files concurrently (files at root level of the new bucket)
             copied_count = 0
+            failed_files = []
+
+            with ThreadPoolExecutor(max_workers=config.COPY_MAX_WORKERS) as executor:
+                futures = {
+                    executor.submit(
+                        copy_file,
+                        source_bucket,
+                        source_key,
+                        new_bucket_name,
+                        source_key.split('/')[-1],  # Just the filename, without the batch folder prefix
+                        size
+                    ): source_key
+                    for source_key, size in source_objects
+                }
 
-            for page in paginator.paginate(Bucket=source_bucket, Prefix=f"{batch_folder}/"):
-                if 'Contents' in page:
-                    for obj in page['Contents']:
-                        source_key = obj['Key']
-
-                        # Skip the folder itself if it appears as an object
-                        if source_key.endswith('/'):
-                            continue
-
-                        # Get just the filename (without the batch folder prefix)
-                        filename = source_key.split('/')[-1]
-
-                        # Copy to new bucket (files at root level)
-                        copy_source = {'Bucket': source_bucket, 'Key': source_key}
-                        s3_client.copy_object(
-                            CopySource=copy_source,
-                            Bucket=new_bucket_name,
-                            Key=filename
-                        )
+                for future in as_completed(futures):
+                    try:
+                        future.result()
                         copied_count += 1
+                    except Exception as e:
+                        print(f"Error copying {futures[future]}: {str(e)}")
+                        failed_files.append({
+                            'file': futures[future],
+                            'error': str(e)
+                        })
 
-            print(f"Copied {copied_count} files to {new_bucket_name}")
+            print(f"Copied {copied_count} files to {new_bucket_name} ({len(failed_files)} failed)")
 
             created_buckets.append({
                 'batch_folder': batch_folder,
                 'new_bucket': new_bucket_name,
-                'files_copied': copied_count
+                'files_copied': copied_count,
+                'files_failed': len(failed_files),
+                'failed_files': failed_files
             })
 
         print(f"Successfully created {len(created_buckets)} buckets")
@@ -1,9 +1,88 @@
 import boto3
+import heapq
 import json
+from collections import Counter, deque
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 import config
 
-s3_client = boto3.client('s3')
+MB = 1024 * 1024
+
+# Shared across copy threads (boto3 clients are thread-safe); the connection
+# pool must be at least as large as the worker pool or threads queue on it
+s3_client = boto3.client('s3', config=Config(max_pool_connections=max(128, config.COPY_MAX_WORKERS)))
+
+# Objects above the threshold are copied as parallel UploadPartCopy requests
+# (server-side, no data passes through Lambda), which also lifts the 5 GB
+# single copy_object limit
+transfer_config = TransferConfig(multipart_threshold=100 * MB, max_concurrency=20, use_threads=True)
+
+def iter_pdf_keys(bucket_name):
+    """
+    Yield (key, size) for PDFs that are NOT already in batch folders, page by page, in
+    the same lexicographic order as a flat listing of the bucket.
+    Only the top level is listed with Delimiter='/', so the batch-N/ folders
+    are skipped outright; every other top-level folder is listed flat.
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+
+    for page in paginator.paginate(
+        Bucket=bucket_name,
+        Delimiter='/',
+        FetchOwner=False,
+        PaginationConfig={'PageSize': 1000}
+    ):
+        # Both lists are sorted; merging them and expanding each folder in
+        # place keeps the flat key order (a folder's keys sort contiguously)
+        files = ((obj['Key'], obj['Size']) for obj in page.get('Contents', ()))
+        folders = ((common_prefix['Prefix'], None) for common_prefix in page.get('CommonPrefixes', ()))
+
+        for name, size in heapq.merge(files, folders, key=itemgetter(0)):
+            if name.startswith('batch-'):
+                continue
+            if size is None:
+                yield from iter_folder_pdf_keys(bucket_name, name)
+            elif name.endswith('.pdf'):
+                yield name, size
+
+def iter_folder_pdf_keys(bucket_name, prefix):
+    """Yield (key, size) for every PDF under a folder prefix with a flat (no delimiter) listing"""
+    paginator = s3_client.get_paginator('list_objects_v2')
+
+    for page in paginator.paginate(
+        Bucket=bucket_name,
+        Prefix=prefix,
+        FetchOwner=False,
+        PaginationConfig={'PageSize': 1000}
+    ):
+        for obj in page.get('Contents', ()):
+            key = obj['Key']
+            if key.endswith('.pdf'):
+                yield key, obj['Size']
+
+def copy_file(bucket_name, source_key, dest_key, size):
+    """Copy a single object within the bucket"""
+    copy_source = {'Bucket': bucket_name, 'Key': source_key}
+
+    # The listing already gave the size, so small objects (nearly every PDF)
+    # take a single CopyObject; copy() would add a HeadObject and spin up a
+    # transfer thread pool per call
+    if size < transfer_config.multipart_threshold:
+        s3_client.copy_object(
+            CopySource=copy_source,
+            Bucket=bucket_name,
+            Key=dest_key
+        )
+    else:
+        s3_client.copy(
+            CopySource=copy_source,
+            Bucket=bucket_name,
+            Key=dest_key,
+            Config=transfer_config
+        )
 
 def lambda_handler(event, context):
     """
@@ -17,19 +96,46 @@ def lambda_handler(event, context):
     print(f"Batch size: {batch_size}")
 
     try:
-        # List all PDF files in the bucket
-        pdf_files = []
-        paginator = s3_client.get_paginator('list_objects_v2')
-
-        for page in paginator.paginate(Bucket=bucket_name):
-            if 'Contents' in page:
-                for obj in page['Contents']:
-                    key = obj['Key']
-                    # Only include PDF files that are NOT already in batch folders
-                    if key.endswith('.pdf') and not key.startswith('batch-'):
-                        pdf_files.append(key)
-
-        total_files = len(pdf_files)
+        # Copy files while the bucket is still being listed. In-flight copies
+        # are capped at twice the worker count so memory stays O(workers)
+        # instead of O(total files); a failed copy re-raises here.
+        max_workers = config.COPY_MAX_WORKERS
+        pending = deque()
+        total_files = 0
+        copied_count = 0
+        batch_summary = Counter()
+
+        def finish_oldest():
+            nonlocal copied_count
+            batch_name, future = pending.popleft()
+            future.result()
+            batch_summary[batch_name] += 1
+            copied_count += 1
+
+            # Log progress every 100 files
+            if copied_count % 100 == 0:
+                print(f"Progress: {copied_count} files copied")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for idx, (file_key, size) in enumerate(iter_pdf_keys(bucket_name)):
+                batch_num = (idx // batch_size) + 1
+
+                # Get just the filename
+                filename = file_key.split('/')[-1]
+
+                # Define new key in batch folder
+                new_key = f"batch-{batch_num}/{filename}"
+
+                future = executor.submit(copy_file, bucket_name, file_key, new_key, size)
+                pending.append((f"batch-{batch_num}", future))
+                total_files += 1
+
+                if len(pending) >= 2 * max_workers:
+                    finish_oldest()
+
+            while pending:
+                finish_oldest()
+
         print(f"Found {total_files} PDF files to organize")
 
         if total_files == 0:
@@ -40,45 +146,9 @@ def lambda_handler(event, context):
 
         # Calculate number of batches
         total_batches = (total_files + batch_size - 1) // batch_size
-        print(f"Will create {total_batches} batches")
-
-        # Organize files into batches
-        copied_count = 0
-        for idx, file_key in enumerate(pdf_files):
-            batch_num = (idx // batch_size) + 1
-
-            # Get just the filename
-            filename = file_key.split('/')[-1]
-
-            # Define new key in batch folder
-            new_key = f"batch-{batch_num}/{filename}"
-
-            # Copy file to batch folder
-            copy_source = {'Bucket': bucket_name, 'Key': file_key}
-            s3_client.copy_object(
-                CopySource=copy_source,
-                Bucket=bucket_name,
-                Key=new_key
-            )
-
-            copied_count += 1
-
-            # Log progress every 100 files
-            if copied_count % 100 == 0:
-                print(f"Progress: {copied_count}/{total_files} files copied")
 
         print(f"Successfully organized {copied_count} files into {total_batches} batches")
 
-        # Get summary of batches
-        batch_summary = {}
-        for batch_num in range(1, total_batches + 1):
-            response = s3_client.list_objects_v2(
-                Bucket=bucket_name,
-                Prefix=f"batch-{batch_num}/"
-            )
-            count = len(response.get('Contents', [])) - 1  # Subtract 1 for the folder itself if counted
-            batch_summary[f"batch-{batch_num}"] = count
-
         return {
             'statusCode': 200,
             'body': json.dumps({
@@ -26,6 +26,11 @@ REGION="${AWS_REGION:-us-east-1}"
 AWS_PROFILE="${AWS_PROFILE:-default}"
 TIMEOUT="${LAMBDA_TIMEOUT:-900}"
 MEMORY="${LAMBDA_MEMORY:-1024}"
+COPY_MAX_WORKERS="${COPY_MAX_WORKERS:-64}"
+LIST_CACHE_TTL="${LIST_CACHE_TTL:-0}"
+USE_BATCH_OPERATIONS="${USE_BATCH_OPERATIONS:-false}"
+BATCH_OPERATIONS_ROLE_ARN="${BATCH_OPERATIONS_ROLE_ARN:-}"
+BATCH_OPERATIONS_PREFIX="${BATCH_OPERATIONS_PREFIX:-s3-batch-operations/}"
 
 echo "====================================================================="
 echo "S3 Bucket Creator Lambda Deployment"
@@ -104,6 +109,31 @@ else
     echo "IAM role already exists: $ROLE_ARN"
 fi
 
+# S3 Batch Operations jobs run as BATCH_OPERATIONS_ROLE_ARN, so CreateJob
+# needs permission to pass that role (applied to new and existing roles)
+if [ -n "$BATCH_OPERATIONS_ROLE_ARN" ]; then
+    cat > /tmp/passrole-policy.json <<EOF
+{
+  "Version": "2012-10-17",
+  "Statement": [
+    {
+      "Effect": "Allow",
+      "Action": "iam:PassRole",
+      "Resource": "$BATCH_OPERATIONS_ROLE_ARN"
+    }
+  ]
+}
+EOF
+
+    aws iam put-role-policy \
+        --role-name $ROLE_NAME \
+        --policy-name BatchOperationsPassRole \
+        --policy-document file:///tmp/passrole-policy.json \
+        --profile $AWS_PROFILE
+
+    echo "Allowed role to pass $BATCH_OPERATIONS_ROLE_ARN to S3 Batch Operations"
+fi
+
 echo ""
 
 # Step 2: Package Lambda function
@@ -126,7 +156,7 @@ if [ -z "$FUNCTION_EXISTS" ]; then
         --zip-file fileb://lambda_function.zip \
         --timeout $TIMEOUT \
         --memory-size $MEMORY \
-        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,AWS_REGION=$REGION,BATCH_SIZE=$BATCH_SIZE}" \
+        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,AWS_REGION=$REGION,BATCH_SIZE=$BATCH_SIZE,COPY_MAX_WORKERS=$COPY_MAX_WORKERS,LIST_CACHE_TTL=$LIST_CACHE_TTL,USE_BATCH_OPERATIONS=$USE_BATCH_OPERATIONS,BATCH_OPERATIONS_ROLE_ARN=$BATCH_OPERATIONS_ROLE_ARN,BATCH_OPERATIONS_PREFIX=$BATCH_OPERATIONS_PREFIX}" \
         --profile $AWS_PROFILE \
         --region $REGION \
         --no-cli-pager
@@ -145,7 +175,7 @@ else
     echo "Updating Lambda environment variables..."
     aws lambda update-function-configuration \
         --function-name $FUNCTION_NAME \
-        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,AWS_REGION=$REGION,BATCH_SIZE=$BATCH_SIZE}" \
+        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,AWS_REGION=$REGION,BATCH_SIZE=$BATCH_SIZE,COPY_MAX_WORKERS=$COPY_MAX_WORKERS,LIST_CACHE_TTL=$LIST_CACHE_TTL,USE_BATCH_OPERATIONS=$USE_BATCH_OPERATIONS,BATCH_OPERATIONS_ROLE_ARN=$BATCH_OPERATIONS_ROLE_ARN,BATCH_OPERATIONS_PREFIX=$BATCH_OPERATIONS_PREFIX}" \
         --profile $AWS_PROFILE \
         --region $REGION \
         --no-cli-pager
@@ -181,7 +211,7 @@ echo ""
 # Cleanup
 rm -f lambda_function.zip
 rm -f /tmp/trust-policy.json
-rm -f /tmp/s3-policy.json
+rm -f /tmp/s3-policy.json /tmp/passrole-policy.json
 
 echo ""
 echo "====================================================================="
@@ -16,6 +16,10 @@ OUTPUT_BUCKET = os.environ.get('OUTPUT_BUCKET', SOURCE_BUCKET)
 # Prefix for output files (e.g., 'processed/', 'results/', or empty string)
 OUTPUT_PREFIX = os.environ.get('OUTPUT_PREFIX', 'processed/')
 
+# OUTPUT_PREFIX with exactly one trailing slash (or empty), computed once
+# at import instead of on every get_output_key() call
+_NORMALIZED_PREFIX = (OUTPUT_PREFIX.rstrip('/') + '/') if OUTPUT_PREFIX else ''
+
 # ============================================================================
 # AWS Configuration
 # ============================================================================
@@ -32,10 +36,46 @@ DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'textract-jobs')
 # Features to extract from documents
 FEATURE_TYPES = ['FORMS', 'TABLES']
 
+# Number of StartDocumentAnalysis calls the batch initiator keeps in flight.
+# Textract's start quota (TPS) is the real ceiling, so raising this beyond
+# what the account quota allows only produces throttling retries.
+TEXTRACT_MAX_WORKERS = int(os.environ.get('TEXTRACT_MAX_WORKERS', '32'))
+
+# Number of SQS records the result processor handles concurrently. Each one
+# holds a full document's blocks and extracted output in memory, so raise it
+# only together with LAMBDA_PROCESSOR_MEMORY.
+PROCESSOR_MAX_WORKERS = int(os.environ.get('PROCESSOR_MAX_WORKERS', '2'))
+
 # ============================================================================
 # Helper Functions
 # ============================================================================
 
+def normalize_prefix(prefix):
+    """
+    Ensure a non-empty S3 prefix ends with '/'.
+
+    Listing with a folder-style prefix keeps S3 from range-scanning sibling
+    keys that merely share the same leading characters (e.g. "batch-1"
+    also matching "batch-10/", "batch-11/", ...).
+
+    Args:
+        prefix: S3 key prefix (e.g., "batch-1" or "batch-1/")
+
+    Returns:
+        Prefix with a trailing slash (e.g., "batch-1/"), or "" if empty
+
+    Examples:
+        >>> normalize_prefix("batch-1")
+        'batch-1/'
+
+        >>> normalize_prefix("batch-1/")
+        'batch-1/'
+    """
+    if prefix and not prefix.endswith('/'):
+        return prefix + '/'
+    return prefix
+
+
 def get_output_key(batch_prefix, filename):
     """
     Generate S3 key for output file.
@@ -51,18 +91,14 @@ def get_output_key(batch_prefix, filename):
         >>> get_output_key("batch-1/", "doc.json")
         'processed/batch-1/doc.json'
 
-        >>> # With empty OUTPUT_PREFIX
-        >>> OUTPUT_PREFIX = ""
+        >>> get_output_key("batch-1", "doc.json")
+        'processed/batch-1/doc.json'
+
+        >>> # With OUTPUT_PREFIX="" in the environment
         >>> get_output_key("batch-1/", "doc.json")
         'batch-1/doc.json'
     """
-    if OUTPUT_PREFIX:
-        # Remove trailing slash from prefix if present, then add it back
-        prefix = OUTPUT_PREFIX.rstrip('/') + '/'
-        return f"{prefix}{batch_prefix}{filename}"
-    else:
-        # No prefix, just batch and filename
-        return f"{batch_prefix}{filename}"
+    return f"{_NORMALIZED_PREFIX}{normalize_prefix(batch_prefix)}{filename}"
 
 
 def get_s3_uri(bucket, key):
@@ -1,13 +1,47 @@
 import boto3
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from botocore.config import Config
 import config
 
-textract_client = boto3.client('textract', region_name=config.AWS_REGION)
-s3_client = boto3.client('s3', region_name=config.AWS_REGION)
-dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION)
+# Clients are shared by the worker threads (boto3 clients are thread-safe).
+# Adaptive retries rate-limit client-side when a service starts throttling,
+# so a burst of job starts backs off together instead of stalling a worker.
+client_config = Config(
+    max_pool_connections=max(64, config.TEXTRACT_MAX_WORKERS),
+    retries={'mode': 'adaptive', 'max_attempts': 10}
+)
+
+textract_client = boto3.client('textract', region_name=config.AWS_REGION, config=client_config)
+s3_client = boto3.client('s3', region_name=config.AWS_REGION, config=client_config)
+dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION, config=client_config)
 table = dynamodb.Table(config.DYNAMODB_TABLE_NAME)
 
+# BatchWriteItem accepts at most 25 items per request
+DYNAMODB_BATCH_SIZE = 25
+
+
+def write_job_records(items):
+    """
+    Writes up to DYNAMODB_BATCH_SIZE job records with BatchWriteItem,
+    retrying unprocessed items with backoff.
+
+    Returns the items that could not be written; raises on request errors.
+    """
+    request_items = {table.name: [{'PutRequest': {'Item': item}} for item in items]}
+
+    for attempt in range(5):
+        response = dynamodb.batch_write_item(RequestItems=request_items)
+        request_items = response.get('UnprocessedItems') or {}
+        if not request_items:
+            return []
+        time.sleep(0.05 * 2 ** attempt)
+
+    return [request['PutRequest']['Item'] for request in request_items[table.name]]
+
+
 def lambda_handler(event, context):
     """
     Initiates Textract processing for all PDFs in a batch folder.
@@ -21,31 +55,35 @@ def lambda_handler(event, context):
     }
     """
     bucket_name = event.get('bucket_name', config.SOURCE_BUCKET)
-    batch_prefix = event['batch_prefix']
+    batch_prefix = config.normalize_prefix(event['batch_prefix'])
     sns_topic_arn = event['sns_topic_arn']
     role_arn = event['textract_role_arn']
 
     print(f"Processing batch: {batch_prefix}")
 
+    # All jobs in this invocation share one StartTime (they start within
+    # seconds of each other)
+    start_time = datetime.utcnow().isoformat()
+
     # List all PDFs in the batch folder
     paginator = s3_client.get_paginator('list_objects_v2')
     pages = paginator.paginate(
         Bucket=bucket_name,
-        Prefix=batch_prefix
+        Prefix=batch_prefix,
+        FetchOwner=False,
+        PaginationConfig={'PageSize': 1000}
     )
 
     pdf_files = []
     for page in pages:
-        for obj in page.get('Contents', []):
+        for obj in page.get('Contents', ()):
             if obj['Key'].endswith('.pdf'):
                 pdf_files.append(obj['Key'])
 
     print(f"Found {len(pdf_files)} PDF files")
 
-    jobs_started = []
-    jobs_failed = []
-
-    for pdf_key in pdf_files:
+    def start_one(pdf_key):
+        """Start analysis for one PDF; returns a result dict."""
         try:
             # Start asynchronous document analysis
             response = textract_client.start_document_analysis(
@@ -64,30 +102,72 @@ def lambda_handler(event, context):
 
             job_id = response['JobId']
 
-            # Store job mapping in DynamoDB for tracking
-            table.put_item(Item={
-                'JobId': job_id,
-                'SourceKey': pdf_key,
-                'Bucket': bucket_name,
-                'BatchPrefix': batch_prefix,
-                'Status': 'IN_PROGRESS',
-                'StartTime': datetime.utcnow().isoformat()
-            })
-
-            jobs_started.append({
+            print(f"Started job {job_id} for {pdf_key}")
+
+            return {
                 'pdf': pdf_key,
                 'job_id': job_id
-            })
-
-            print(f"Started job {job_id} for {pdf_key}")
+            }
 
         except Exception as e:
             error_msg = f"Error processing {pdf_key}: {str(e)}"
             print(error_msg)
-            jobs_failed.append({
+            return {
                 'pdf': pdf_key,
                 'error': str(e)
-            })
+            }
+
+    jobs_started = []
+    jobs_failed = []
+
+    # Started jobs waiting for their DynamoDB record to be written
+    pending = []
+
+    def flush_pending():
+        """Store the pending job mappings; jobs whose record fails to write are reported as failed."""
+        items = [{
+            'JobId': result['job_id'],
+            'SourceKey': result['pdf'],
+            'Bucket': bucket_name,
+            'BatchPrefix': batch_prefix,
+            'Status': 'IN_PROGRESS',
+            'StartTime': start_time
+        } for result in pending]
+
+        try:
+            unwritten = {item['JobId'] for item in write_job_records(items)}
+            error = 'DynamoDB write left the item unprocessed'
+        except Exception as e:
+            print(f"Error storing {len(items)} job records in DynamoDB: {str(e)}")
+            unwritten = {item['JobId'] for item in items}
+            error = str(e)
+
+        for result in pending:
+            if result['job_id'] in unwritten:
+                print(f"Job {result['job_id']} for {result['pdf']} started but not tracked: {error}")
+                jobs_failed.append({**result, 'error': error})
+            else:
+                jobs_started.append(result)
+        pending.clear()
+
+    # Jobs start on the worker threads; their mappings are written from this
+    # thread, DYNAMODB_BATCH_SIZE items per BatchWriteItem request
+    with ThreadPoolExecutor(max_workers=config.TEXTRACT_MAX_WORKERS) as executor:
+        futures = [executor.submit(start_one, pdf_key) for pdf_key in pdf_files]
+
+        for future in as_completed(futures):
+            result = future.result()
+
+            if 'error' in result:
+                jobs_failed.append(result)
+                continue
+
+            pending.append(result)
+            if len(pending) == DYNAMODB_BATCH_SIZE:
+                flush_pending()
+
+    if pending:
+        flush_pending()
 
     return {
         'statusCode': 200,
@@ -1,13 +1,34 @@
 import boto3
+import gzip
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from botocore.config import Config
 import config
 
-textract_client = boto3.client('textract', region_name=config.AWS_REGION)
-s3_client = boto3.client('s3', region_name=config.AWS_REGION)
-dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION)
+try:
+    import orjson
+except ImportError:
+    # Bundled into the Lambda package by 03_deploy_lambdas.sh
+    orjson = None
+
+# Adaptive retries rate-limit client-side when a service starts throttling
+# (e.g. GetDocumentAnalysis during a burst of completions)
+client_config = Config(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 10}
+)
+
+textract_client = boto3.client('textract', region_name=config.AWS_REGION, config=client_config)
+s3_client = boto3.client('s3', region_name=config.AWS_REGION, config=client_config)
+dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION, config=client_config)
 table = dynamodb.Table(config.DYNAMODB_TABLE_NAME)
 
+# Only blocks that relationships point at (WORD, CELL, KEY_VALUE_SET) or
+# that are resolved after the last page (TABLE) are kept in block_map;
+# LINE, PAGE, SELECTION_ELEMENT, etc. are never looked up again
+INDEXED_BLOCK_TYPES = frozenset({'WORD', 'CELL', 'KEY_VALUE_SET', 'TABLE'})
+
 def lambda_handler(event, context):
     """
     Triggered by SQS messages from SNS topic.
@@ -15,145 +36,235 @@ def lambda_handler(event, context):
     """
     processed_count = 0
     failed_count = 0
-
-    for record in event['Records']:
-        try:
-            # Parse SNS message from SQS
-            sns_message = json.loads(record['body'])
-            message = json.loads(sns_message['Message'])
-
-            job_id = message['JobId']
-            status = message['Status']
-
-            print(f"Processing job {job_id} with status: {status}")
-
-            if status != 'SUCCEEDED':
-                print(f"Job {job_id} failed with status: {status}")
-                # Update DynamoDB to mark as failed
-                table.update_item(
-                    Key={'JobId': job_id},
-                    UpdateExpression='SET #status = :status, CompletedTime = :time',
-                    ExpressionAttributeNames={'#status': 'Status'},
-                    ExpressionAttributeValues={
-                        ':status': f'FAILED_{status}',
-                        ':time': datetime.utcnow().isoformat()
-                    }
-                )
+    batch_item_failures = []
+
+    # Records are independent (Textract + S3 + DynamoDB I/O), so process
+    # them concurrently. Only records that raised are reported back to SQS
+    # (ReportBatchItemFailures) so successful ones are not redelivered.
+    with ThreadPoolExecutor(max_workers=config.PROCESSOR_MAX_WORKERS) as executor:
+        futures = {executor.submit(process_record, record): record for record in event['Records']}
+
+        for future in as_completed(futures):
+            try:
+                if future.result():
+                    processed_count += 1
+                else:
+                    failed_count += 1
+            except Exception as e:
+                print(f"Error processing record: {str(e)}")
                 failed_count += 1
-                continue
+                batch_item_failures.append({'itemIdentifier': futures[future]['messageId']})
 
-            # Get job details from DynamoDB
-            response = table.get_item(Key={'JobId': job_id})
-
-            if 'Item' not in response:
-                print(f"Job {job_id} not found in DynamoDB")
-                failed_count += 1
-                continue
+    return {
+        'statusCode': 200,
+        'body': json.dumps({
+            'processed': processed_count,
+            'failed': failed_count
+        }),
+        'batchItemFailures': batch_item_failures
+    }
 
-            job_data = response['Item']
 
-            # Retrieve Textract results with pagination
-            blocks = []
-            next_token = None
+def process_record(record):
+    """
+    Retrieves and saves the Textract result for one SQS record.
 
-            while True:
-                if next_token:
-                    result = textract_client.get_document_analysis(
-                        JobId=job_id,
-                        NextToken=next_token
-                    )
-                else:
-                    result = textract_client.get_document_analysis(JobId=job_id)
+    Returns True when the result was saved and False when the Textract job
+    itself did not succeed (nothing to retry). Raises on errors that should
+    be retried by SQS.
+    """
+    # Parse SNS message from SQS
+    sns_message = json.loads(record['body'])
+    message = json.loads(sns_message['Message'])
 
-                blocks.extend(result['Blocks'])
+    job_id = message['JobId']
+    status = message['Status']
 
-                if 'NextToken' in result:
-                    next_token = result['NextToken']
-                else:
-                    break
-
-            print(f"Retrieved {len(blocks)} blocks for job {job_id}")
-
-            # Parse key-value pairs and text
-            extracted_data = parse_textract_response(blocks)
-
-            # Add metadata
-            extracted_data['metadata'] = {
-                'source_file': job_data['SourceKey'],
-                'bucket': job_data['Bucket'],
-                'batch': job_data['BatchPrefix'],
-                'job_id': job_id,
-                'processed_time': datetime.utcnow().isoformat(),
-                'total_blocks': len(blocks)
-            }
-
-            # Save to S3 using config for output location
-            filename = job_data['SourceKey'].split('/')[-1].replace('.pdf', '.json')
-            output_key = config.get_output_key(job_data['BatchPrefix'], filename)
-
-            # Use OUTPUT_BUCKET from config (can be different from source bucket)
-            output_bucket = config.OUTPUT_BUCKET
-
-            s3_client.put_object(
-                Bucket=output_bucket,
-                Key=output_key,
-                Body=json.dumps(extracted_data, indent=2),
-                ContentType='application/json'
-            )
+    print(f"Processing job {job_id} with status: {status}")
 
-            # Update DynamoDB
+    if status != 'SUCCEEDED':
+        print(f"Job {job_id} failed with status: {status}")
+        # Update DynamoDB to mark as failed. The condition keeps this from
+        # creating a stub record that the initiator's pending batch write
+        # would later overwrite with IN_PROGRESS, losing the failure.
+        try:
             table.update_item(
                 Key={'JobId': job_id},
-                UpdateExpression='SET #status = :status, OutputKey = :output, CompletedTime = :time',
+                UpdateExpression='SET #status = :status, CompletedTime = :time',
+                ConditionExpression='attribute_exists(JobId)',
                 ExpressionAttributeNames={'#status': 'Status'},
                 ExpressionAttributeValues={
-                    ':status': 'COMPLETED',
-                    ':output': output_key,
+                    ':status': f'FAILED_{status}',
                     ':time': datetime.utcnow().isoformat()
                 }
             )
+        except table.meta.client.exceptions.ConditionalCheckFailedException:
+            # The initiator has not written the job record yet; raise so SQS
+            # redelivers the message once it exists
+            raise LookupError(f"Job {job_id} not found in DynamoDB")
+        return False
+
+    # Get job details from DynamoDB
+    response = table.get_item(Key={'JobId': job_id})
+
+    if 'Item' not in response:
+        # The initiator may not have flushed its batch of job records yet;
+        # raise so SQS redelivers the message
+        raise LookupError(f"Job {job_id} not found in DynamoDB")
+
+    job_data = response['Item']
+
+    # Retrieve Textract results with pagination, parsing each page as
+    # it arrives instead of buffering every block first
+    extracted_data = new_extracted_data()
+    block_map = {}
+    total_blocks = 0
+    next_token = None
+
+    while True:
+        if next_token:
+            result = textract_client.get_document_analysis(
+                JobId=job_id,
+                MaxResults=1000,
+                NextToken=next_token
+            )
+        else:
+            result = textract_client.get_document_analysis(
+                JobId=job_id,
+                MaxResults=1000
+            )
 
-            print(f"Successfully processed {job_data['SourceKey']} -> {output_key}")
-            processed_count += 1
+        parse_textract_response_incremental(result['Blocks'], block_map, extracted_data)
+        total_blocks += len(result['Blocks'])
 
-        except Exception as e:
-            print(f"Error processing record: {str(e)}")
-            failed_count += 1
+        if 'NextToken' in result:
+            next_token = result['NextToken']
+        else:
+            break
 
-    return {
-        'statusCode': 200,
-        'body': json.dumps({
-            'processed': processed_count,
-            'failed': failed_count
-        })
-    }
+    print(f"Retrieved {total_blocks} blocks for job {job_id}")
 
+    # Same timestamp for the result metadata and the DynamoDB record
+    processed_time = datetime.utcnow().isoformat()
 
-def parse_textract_response(blocks):
+    # Parse key-value pairs and tables now that all blocks are known
+    finalize_textract_response(block_map, extracted_data)
+
+    # Add metadata
+    extracted_data['metadata'] = {
+        'source_file': job_data['SourceKey'],
+        'bucket': job_data['Bucket'],
+        'batch': job_data['BatchPrefix'],
+        'job_id': job_id,
+        'processed_time': processed_time,
+        'total_blocks': total_blocks
+    }
+
+    # Save to S3 using config for output location
+    filename = job_data['SourceKey'].split('/')[-1].replace('.pdf', '.json.gz')
+    output_key = config.get_output_key(job_data['BatchPrefix'], filename)
+
+    # Use OUTPUT_BUCKET from config (can be different from source bucket)
+    output_bucket = config.OUTPUT_BUCKET
+
+    s3_client.put_object(
+        Bucket=output_bucket,
+        Key=output_key,
+        Body=dumps_result(extracted_data),
+        ContentType='application/json',
+        ContentEncoding='gzip'
+    )
+
+    # Update DynamoDB
+    table.update_item(
+        Key={'JobId': job_id},
+        UpdateExpression='SET #status = :status, OutputKey = :output, CompletedTime = :time',
+        ExpressionAttributeNames={'#status': 'Status'},
+        ExpressionAttributeValues={
+            ':status': 'COMPLETED',
+            ':output': output_key,
+            ':time': processed_time
+        }
+    )
+
+    print(f"Successfully processed {job_data['SourceKey']} -> {output_key}")
+    return True
+
+
+def dumps_result(extracted_data):
     """
-    Extracts raw text, key-value pairs, and tables from Textract blocks.
+    Serialize extracted data for S3 as gzip-compressed JSON.
+
+    Textract output is highly compressible, so the body shrinks several
+    times over; compresslevel=1 keeps the CPU cost minimal. The JSON is
+    written compact since nobody reads the compressed object by hand.
+    Uses orjson when it is available.
     """
-    extracted = {
+    if orjson is not None:
+        payload = orjson.dumps(extracted_data)
+    else:
+        payload = json.dumps(extracted_data, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(payload, compresslevel=1)
+
+
+def new_extracted_data():
+    """Empty result structure filled in by the parse functions."""
+    return {
         'raw_text': [],
         'key_value_pairs': [],
         'tables': []
     }
 
-    # Build block map for relationships
-    block_map = {block['Id']: block for block in blocks}
 
+def parse_textract_response(blocks):
+    """
+    Extracts raw text, key-value pairs, and tables from Textract blocks.
+    """
+    extracted = new_extracted_data()
+    block_map = {}
+
+    parse_textract_response_incremental(blocks, block_map, extracted)
+    finalize_textract_response(block_map, extracted)
+
+    return extracted
+
+
+def parse_textract_response_incremental(blocks, block_map, extracted):
+    """
+    Consumes one page of Textract blocks.
+
+    LINE text is emitted immediately. Blocks in INDEXED_BLOCK_TYPES are
+    added to block_map so that key-value pairs and tables, whose related
+    blocks may arrive on a later page, can be resolved by
+    finalize_textract_response().
+    """
     for block in blocks:
-        if block['BlockType'] == 'LINE':
+        block_type = block['BlockType']
+
+        if block_type in INDEXED_BLOCK_TYPES:
+            block_map[block['Id']] = block
+
+        elif block_type == 'LINE':
             extracted['raw_text'].append({
                 'text': block['Text'],
                 'confidence': block['Confidence']
             })
 
-        elif block['BlockType'] == 'KEY_VALUE_SET':
-            if 'KEY' in block.get('EntityTypes', []):
-                key_text = get_text_from_relationship(block, block_map)
-                value_block = get_value_block(block, block_map)
-                value_text = get_text_from_relationship(value_block, block_map) if value_block else ''
+
+def finalize_textract_response(block_map, extracted):
+    """
+    Extracts key-value pairs and tables once all pages are in block_map.
+    """
+    # Bound once and passed to the helpers so their inner loops use a local
+    # name instead of an attribute lookup per child id
+    get_block = block_map.get
+
+    for block in block_map.values():
+        if block['BlockType'] == 'KEY_VALUE_SET':
+            if 'KEY' in block.get('EntityTypes', ()):
+                key_text = get_text_from_relationship(block, get_block)
+                value_block = get_value_block(block, get_block)
+                value_text = get_text_from_relationship(value_block, get_block) if value_block else ''
 
                 extracted['key_value_pairs'].append({
                     'key': key_text,
@@ -162,41 +273,38 @@ def parse_textract_response(blocks):
                 })
 
         elif block['BlockType'] == 'TABLE':
-            table_data = extract_table(block, block_map)
+            table_data = extract_table(block, get_block)
             if table_data:
                 extracted['tables'].append(table_data)
 
-    return extracted
-
 
-def get_text_from_relationship(block, block_map):
-    """Helper to extract text from CHILD relationships."""
+def get_text_from_relationship(block, get_block):
+    """Helper to extract text from CHILD relationships (get_block is block_map.get)."""
     if not block:
         return ''
 
-    text = ''
-    if 'Relationships' in block:
-        for relationship in block['Relationships']:
-            if relationship['Type'] == 'CHILD':
-                for child_id in relationship['Ids']:
-                    child = block_map.get(child_id)
-                    if child and child['BlockType'] == 'WORD':
-                        text += child['Text'] + ' '
-    return text.strip()
-
-
-def get_value_block(key_block, block_map):
-    """Helper to find VALUE block for a KEY."""
-    if 'Relationships' in key_block:
-        for relationship in key_block['Relationships']:
-            if relationship['Type'] == 'VALUE':
-                for value_id in relationship['Ids']:
-                    return block_map.get(value_id)
+    words = []
+    for relationship in block.get('Relationships', ()):
+        if relationship['Type'] == 'CHILD':
+            words.extend(
+                child['Text']
+                for child in map(get_block, relationship['Ids'])
+                if child is not None and child['BlockType'] == 'WORD'
+            )
+    return ' '.join(words)
+
+
+def get_value_block(key_block, get_block):
+    """Helper to find VALUE block for a KEY (get_block is block_map.get)."""
+    for relationship in key_block.get('Relationships', ()):
+        if relationship['Type'] == 'VALUE':
+            for value_id in relationship['Ids']:
+                return get_block(value_id)
     return None
 
 
-def extract_table(table_block, block_map):
-    """Extract table structure with rows and cells."""
+def extract_table(table_block, get_block):
+    """Extract table structure with rows and cells (get_block is block_map.get)."""
     table_data = {
         'rows': [],
         'confidence': table_block.get('Confidence', 0)
@@ -205,26 +313,30 @@ def extract_table(table_block, block_map):
     if 'Relationships' not in table_block:
         return None
 
-    # Get all CELL blocks
-    cells = {}
+    # Collect CELL blocks and the table dimensions in one pass
+    cell_list = []
+    max_row = 0
+    max_col = 0
     for relationship in table_block['Relationships']:
         if relationship['Type'] == 'CHILD':
             for cell_id in relationship['Ids']:
-                cell_block = block_map.get(cell_id)
+                cell_block = get_block(cell_id)
                 if cell_block and cell_block['BlockType'] == 'CELL':
                     row_index = cell_block.get('RowIndex', 0)
                     col_index = cell_block.get('ColumnIndex', 0)
-                    cell_text = get_text_from_relationship(cell_block, block_map)
-
-                    if row_index not in cells:
-                        cells[row_index] = {}
-                    cells[row_index][col_index] = cell_text
-
-    # Convert to structured rows
-    for row_idx in sorted(cells.keys()):
-        row_data = []
-        for col_idx in sorted(cells[row_idx].keys()):
-            row_data.append(cells[row_idx][col_idx])
-        table_data['rows'].append(row_data)
+                    if row_index < 1 or col_index < 1:
+                        continue
+                    cell_text = get_text_from_relationship(cell_block, get_block)
+
+                    cell_list.append((row_index, col_index, cell_text))
+                    max_row = max(max_row, row_index)
+                    max_col = max(max_col, col_index)
+
+    # Place cells into a preallocated grid (Textract indexes are 1-based);
+    # positions without a CELL block stay empty
+    rows = [[''] * max_col for _ in range(max_row)]
+    for row_index, col_index, cell_text in cell_list:
+        rows[row_index - 1][col_index - 1] = cell_text
+    table_data['rows'] = rows
 
     return table_data if table_data['rows'] else None
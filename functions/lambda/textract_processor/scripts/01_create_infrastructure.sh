@@ -37,13 +37,37 @@ echo "====================================================================="
 echo "1. Creating DynamoDB Table: $DYNAMODB_TABLE_NAME"
 echo "====================================================================="
 
+# Status GSI lets recover_failed_notifications.py query IN_PROGRESS jobs
+# instead of scanning the whole table
+STATUS_INDEX_JSON='[{"IndexName":"StatusIndex","KeySchema":[{"AttributeName":"Status","KeyType":"HASH"}],"Projection":{"ProjectionType":"ALL"}}]'
+
 if aws dynamodb describe-table --table-name $DYNAMODB_TABLE_NAME --profile $AWS_PROFILE --region $REGION 2>/dev/null; then
     echo "  ✓ Table '$DYNAMODB_TABLE_NAME' already exists"
+
+    STATUS_INDEX=$(aws dynamodb describe-table \
+        --table-name $DYNAMODB_TABLE_NAME \
+        --profile $AWS_PROFILE \
+        --region $REGION \
+        --query "Table.GlobalSecondaryIndexes[?IndexName=='StatusIndex'].IndexName" \
+        --output text)
+
+    if [ -z "$STATUS_INDEX" ] || [ "$STATUS_INDEX" = "None" ]; then
+        aws dynamodb update-table \
+            --table-name $DYNAMODB_TABLE_NAME \
+            --attribute-definitions AttributeName=Status,AttributeType=S \
+            --global-secondary-index-updates '[{"Create":{"IndexName":"StatusIndex","KeySchema":[{"AttributeName":"Status","KeyType":"HASH"}],"Projection":{"ProjectionType":"ALL"}}}]' \
+            --profile $AWS_PROFILE \
+            --region $REGION > /dev/null
+        echo "  ✓ StatusIndex GSI creation started (backfills in the background)"
+    else
+        echo "  ✓ StatusIndex GSI already exists"
+    fi
 else
     aws dynamodb create-table \
         --table-name $DYNAMODB_TABLE_NAME \
-        --attribute-definitions AttributeName=JobId,AttributeType=S \
+        --attribute-definitions AttributeName=JobId,AttributeType=S AttributeName=Status,AttributeType=S \
         --key-schema AttributeName=JobId,KeyType=HASH \
+        --global-secondary-indexes "$STATUS_INDEX_JSON" \
         --billing-mode PAY_PER_REQUEST \
         --profile $AWS_PROFILE \
         --region $REGION
@@ -98,6 +122,42 @@ SQS_QUEUE_ARN=$(aws sqs get-queue-attributes \
 
 echo "  ✓ SQS Queue URL: $SQS_QUEUE_URL"
 echo "  ✓ SQS Queue ARN: $SQS_QUEUE_ARN"
+
+# Dead-letter queue: the processor raises for jobs it cannot find in DynamoDB
+# so SQS redelivers them; after 5 receives the message is parked here
+# instead of being retried until the retention period runs out
+SQS_DLQ_NAME="${SQS_QUEUE_NAME}-dlq"
+
+SQS_DLQ_URL=$(aws sqs create-queue \
+    --queue-name $SQS_DLQ_NAME \
+    --attributes MessageRetentionPeriod=1209600 \
+    --profile $AWS_PROFILE \
+    --region $REGION \
+    --query QueueUrl \
+    --output text 2>/dev/null || aws sqs get-queue-url \
+    --queue-name $SQS_DLQ_NAME \
+    --profile $AWS_PROFILE \
+    --region $REGION \
+    --query QueueUrl \
+    --output text)
+
+SQS_DLQ_ARN=$(aws sqs get-queue-attributes \
+    --queue-url $SQS_DLQ_URL \
+    --attribute-names QueueArn \
+    --profile $AWS_PROFILE \
+    --region $REGION \
+    --query 'Attributes.QueueArn' \
+    --output text)
+
+REDRIVE_POLICY_JSON="{\\\"deadLetterTargetArn\\\":\\\"$SQS_DLQ_ARN\\\",\\\"maxReceiveCount\\\":\\\"5\\\"}"
+
+aws sqs set-queue-attributes \
+    --queue-url "$SQS_QUEUE_URL" \
+    --attributes "{\"RedrivePolicy\":\"$REDRIVE_POLICY_JSON\"}" \
+    --profile $AWS_PROFILE \
+    --region $REGION
+
+echo "  ✓ SQS Dead-letter Queue ARN: $SQS_DLQ_ARN (maxReceiveCount: 5)"
 echo ""
 
 # 4. Set SQS Queue Policy to allow SNS to send messages
@@ -151,6 +211,8 @@ export AWS_PROFILE="$AWS_PROFILE"
 export SNS_TOPIC_ARN="$SNS_TOPIC_ARN"
 export SQS_QUEUE_URL="$SQS_QUEUE_URL"
 export SQS_QUEUE_ARN="$SQS_QUEUE_ARN"
+export SQS_DLQ_URL="$SQS_DLQ_URL"
+export SQS_DLQ_ARN="$SQS_DLQ_ARN"
 export SUBSCRIPTION_ARN="$SUBSCRIPTION_ARN"
 EOF
 
@@ -167,6 +229,7 @@ echo "Summary:"
 echo "  - DynamoDB Table: $DYNAMODB_TABLE_NAME"
 echo "  - SNS Topic: $SNS_TOPIC_ARN"
 echo "  - SQS Queue: $SQS_QUEUE_ARN"
+echo "  - SQS Dead-letter Queue: $SQS_DLQ_ARN"
 echo "  - Subscription: $SUBSCRIPTION_ARN"
 echo "  - Source Bucket: $SOURCE_BUCKET"
 echo "  - Output Bucket: $OUTPUT_BUCKET"
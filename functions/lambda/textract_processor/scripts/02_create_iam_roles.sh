@@ -167,6 +167,7 @@ LAMBDA_INITIATOR_POLICY=$(cat <<EOF
       "Effect": "Allow",
       "Action": [
         "dynamodb:PutItem",
+        "dynamodb:BatchWriteItem",
         "dynamodb:GetItem",
         "dynamodb:UpdateItem"
       ],
@@ -63,7 +63,7 @@ if aws lambda get-function --function-name $LAMBDA_INITIATOR_NAME --profile $AWS
         --timeout $LAMBDA_INITIATOR_TIMEOUT \
         --memory-size $LAMBDA_INITIATOR_MEMORY \
         --runtime $LAMBDA_RUNTIME \
-        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,OUTPUT_BUCKET=$OUTPUT_BUCKET,OUTPUT_PREFIX=$OUTPUT_PREFIX,AWS_REGION=$AWS_REGION,DYNAMODB_TABLE_NAME=$DYNAMODB_TABLE_NAME}" \
+        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,OUTPUT_BUCKET=$OUTPUT_BUCKET,OUTPUT_PREFIX=$OUTPUT_PREFIX,AWS_REGION=$AWS_REGION,DYNAMODB_TABLE_NAME=$DYNAMODB_TABLE_NAME,TEXTRACT_MAX_WORKERS=${TEXTRACT_MAX_WORKERS:-32}}" \
         --profile $AWS_PROFILE \
         --region $AWS_REGION > /dev/null
 
@@ -78,7 +78,7 @@ else
         --zip-file fileb://$INITIATOR_ZIP \
         --timeout $LAMBDA_INITIATOR_TIMEOUT \
         --memory-size $LAMBDA_INITIATOR_MEMORY \
-        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,OUTPUT_BUCKET=$OUTPUT_BUCKET,OUTPUT_PREFIX=$OUTPUT_PREFIX,AWS_REGION=$AWS_REGION,DYNAMODB_TABLE_NAME=$DYNAMODB_TABLE_NAME}" \
+        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,OUTPUT_BUCKET=$OUTPUT_BUCKET,OUTPUT_PREFIX=$OUTPUT_PREFIX,AWS_REGION=$AWS_REGION,DYNAMODB_TABLE_NAME=$DYNAMODB_TABLE_NAME,TEXTRACT_MAX_WORKERS=${TEXTRACT_MAX_WORKERS:-32}}" \
         --profile $AWS_PROFILE \
         --region $AWS_REGION > /dev/null
 
@@ -94,10 +94,20 @@ echo "====================================================================="
 
 PROCESSOR_ZIP="$LAMBDA_DIR/lambda_result_processor.zip"
 
-# Package Lambda 2 with config.py
+# Package Lambda 2 with config.py and orjson (fast JSON serialization)
 cd "$LAMBDA_DIR"
 rm -f lambda_result_processor.zip
-zip -q lambda_result_processor.zip lambda_result_processor.py config.py
+rm -rf build_processor
+python3 -m pip install \
+    --quiet \
+    --target build_processor \
+    --platform manylinux2014_x86_64 \
+    --python-version "${LAMBDA_RUNTIME#python}" \
+    --only-binary=:all: \
+    orjson
+cp lambda_result_processor.py config.py build_processor/
+(cd build_processor && zip -q -r ../lambda_result_processor.zip .)
+rm -rf build_processor
 echo "  ✓ Package created: $PROCESSOR_ZIP"
 
 # Create or update Lambda function
@@ -115,7 +125,7 @@ if aws lambda get-function --function-name $LAMBDA_PROCESSOR_NAME --profile $AWS
         --timeout $LAMBDA_PROCESSOR_TIMEOUT \
         --memory-size $LAMBDA_PROCESSOR_MEMORY \
         --runtime $LAMBDA_RUNTIME \
-        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,OUTPUT_BUCKET=$OUTPUT_BUCKET,OUTPUT_PREFIX=$OUTPUT_PREFIX,AWS_REGION=$AWS_REGION,DYNAMODB_TABLE_NAME=$DYNAMODB_TABLE_NAME}" \
+        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,OUTPUT_BUCKET=$OUTPUT_BUCKET,OUTPUT_PREFIX=$OUTPUT_PREFIX,AWS_REGION=$AWS_REGION,DYNAMODB_TABLE_NAME=$DYNAMODB_TABLE_NAME,PROCESSOR_MAX_WORKERS=${PROCESSOR_MAX_WORKERS:-2}}" \
         --profile $AWS_PROFILE \
         --region $AWS_REGION > /dev/null
 
@@ -130,7 +140,7 @@ else
         --zip-file fileb://$PROCESSOR_ZIP \
         --timeout $LAMBDA_PROCESSOR_TIMEOUT \
         --memory-size $LAMBDA_PROCESSOR_MEMORY \
-        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,OUTPUT_BUCKET=$OUTPUT_BUCKET,OUTPUT_PREFIX=$OUTPUT_PREFIX,AWS_REGION=$AWS_REGION,DYNAMODB_TABLE_NAME=$DYNAMODB_TABLE_NAME}" \
+        --environment "Variables={SOURCE_BUCKET=$SOURCE_BUCKET,OUTPUT_BUCKET=$OUTPUT_BUCKET,OUTPUT_PREFIX=$OUTPUT_PREFIX,AWS_REGION=$AWS_REGION,DYNAMODB_TABLE_NAME=$DYNAMODB_TABLE_NAME,PROCESSOR_MAX_WORKERS=${PROCESSOR_MAX_WORKERS:-2}}" \
         --profile $AWS_PROFILE \
         --region $AWS_REGION > /dev/null
 
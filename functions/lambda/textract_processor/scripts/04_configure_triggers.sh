@@ -50,6 +50,7 @@ if [ -n "$EXISTING_MAPPING" ]; then
     aws lambda update-event-source-mapping \
         --uuid $EXISTING_MAPPING \
         --batch-size 10 \
+        --function-response-types ReportBatchItemFailures \
         --profile $AWS_PROFILE \
         --region $AWS_REGION > /dev/null
 
@@ -61,6 +62,7 @@ else
         --function-name $LAMBDA_PROCESSOR_NAME \
         --event-source-arn $SQS_QUEUE_ARN \
         --batch-size 10 \
+        --function-response-types ReportBatchItemFailures \
         --enabled \
         --profile $AWS_PROFILE \
         --region $AWS_REGION \
@@ -87,6 +89,7 @@ echo "Summary:"
 echo "  - SQS Queue: $SQS_QUEUE_ARN"
 echo "  - Lambda Function: $LAMBDA_PROCESSOR_NAME"
 echo "  - Batch Size: 10 messages"
+echo "  - Response Types: ReportBatchItemFailures"
 echo ""
 echo "Next step:"
 echo "  Run: ./05_process_batches.sh"
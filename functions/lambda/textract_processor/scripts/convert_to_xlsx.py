@@ -1,35 +1,55 @@
 #!/usr/bin/env python3
 """
 Convert Textract JSON results to XLSX format for Google Sheets/Excel import
-Uses openpyxl for better handling of complex data
+Writes the workbook XML directly, streaming rows into the zip archive
 """
 
+import gzip
 import json
 import os
+import pickle
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from xml.sax.saxutils import escape, quoteattr
 
 try:
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment
-    from openpyxl.utils import get_column_letter
+    import orjson
 except ImportError:
-    print("Error: openpyxl not installed!")
-    print("Install with: pip install openpyxl")
-    print("Then run: python3 ./scripts/convert_to_xlsx.py")
-    exit(1)
+    # Optional: ~3x faster decoding (pip install orjson); falls back to json
+    orjson = None
+
+# Excel cells hold at most 32,767 characters; full_text is capped below that
+FULL_TEXT_MAX_CHARS = 32000
+
+# Bump when process_json_file() output changes so cached results are discarded
+CACHE_VERSION = 2
 
 def process_json_file(json_path):
-    """Extract key information from a Textract JSON result"""
-    with open(json_path, 'r') as f:
-        data = json.load(f)
+    """Extract key information from a Textract JSON result (.json or .json.gz)"""
+    raw = Path(json_path).read_bytes()
+    if str(json_path).endswith('.gz'):
+        raw = gzip.decompress(raw)
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
     # Extract metadata
     metadata = data.get('metadata', {})
 
     # Extract all text
     raw_text_blocks = data.get('raw_text', [])
-    full_text = '\n'.join([block.get('text', '') for block in raw_text_blocks])
+    # Stop collecting lines once the cell limit is reached instead of joining
+    # every line of very large documents
+    lines = []
+    length = 0
+    for block in raw_text_blocks:
+        text = block.get('text', '')
+        lines.append(text)
+        length += len(text) + 1
+        if length > FULL_TEXT_MAX_CHARS:
+            break
+    full_text = '\n'.join(lines)[:FULL_TEXT_MAX_CHARS]
 
     # Extract key-value pairs
     key_value_pairs = data.get('key_value_pairs', [])
@@ -53,29 +73,201 @@ def process_json_file(json_path):
         }
     }
 
-def create_summary_sheet(wb, results):
-    """Create summary sheet with high-level info"""
-    ws = wb.active
-    ws.title = "Summary"
+def iter_json_files(directory):
+    """Recursively yield the paths (as strings) of .json and .json.gz files under directory"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_json_files(entry.path)
+            elif entry.name.endswith(('.json', '.json.gz')):
+                yield entry.path
+
+def load_cache(cache_path):
+    """Load the per-file result cache (path -> (mtime, size, result)); empty if missing, unreadable or stale"""
+    try:
+        with open(cache_path, 'rb') as f:
+            version, cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError, TypeError):
+        return {}
+    return cache if version == CACHE_VERSION else {}
+
+def save_cache(cache_path, cache):
+    """Persist the per-file result cache"""
+    with open(cache_path, 'wb') as f:
+        pickle.dump((CACHE_VERSION, cache), f, protocol=5)
+
+def _safe_process(json_path):
+    """Run process_json_file, reporting errors instead of raising so one bad file doesn't stop the pool"""
+    try:
+        return process_json_file(json_path)
+    except Exception as e:
+        print(f"Error processing {json_path}: {e}")
+        return None
+
+# Characters that are not allowed in XML 1.0 text
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_XML_DECL = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+def _column_letter(col):
+    """Convert a 1-based column index to its letter (1 -> A, 27 -> AA)"""
+    letters = ''
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+class _XlsxStreamWriter:
+    """
+    Minimal append-only XLSX writer.
+
+    Each sheet is streamed row by row into the zip archive as inline-string
+    cells, so memory stays O(row) regardless of the number of documents.
+    Supports column widths and one header style per sheet; no formulas,
+    merges or shared strings.
+    """
+
+    def __init__(self, path):
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self._sheets = []
+        self._header_styles = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add_sheet(self, title, headers, widths, rows, header_style):
+        """
+        Write a sheet: a styled header row followed by rows (any iterable of
+        sequences). header_style is (fill_color, font_color, centered) with
+        RGB hex colors; widths is one column width per header.
+        """
+        # Sheets sharing a header style share one cellXfs entry
+        if header_style not in self._header_styles:
+            self._header_styles.append(header_style)
+        style_id = self._header_styles.index(header_style) + 1
+        self._sheets.append(title)
+        letters = [_column_letter(col) for col in range(1, len(headers) + 1)]
+
+        with self._zip.open(f'xl/worksheets/sheet{len(self._sheets)}.xml', 'w') as f:
+            cols = ''.join(
+                f'<col min="{col}" max="{col}" width="{width}" customWidth="1"/>'
+                for col, width in enumerate(widths, 1)
+            )
+            f.write(f'{_XML_DECL}<worksheet xmlns="{_MAIN_NS}"><cols>{cols}</cols><sheetData>'.encode('utf-8'))
+            f.write(self._row_xml(1, letters, headers, style_id).encode('utf-8'))
+            for row_num, row in enumerate(rows, 2):
+                f.write(self._row_xml(row_num, letters, row).encode('utf-8'))
+            f.write(b'</sheetData></worksheet>')
+
+    @staticmethod
+    def _row_xml(row_num, letters, values, style_id=None):
+        """Serialize one row; strings become inline strings, numbers stay numeric"""
+        style = f' s="{style_id}"' if style_id else ''
+        cells = []
+        for letter, value in zip(letters, values):
+            if value is None:
+                continue
+            ref = f'{letter}{row_num}'
+            if isinstance(value, (int, float)):
+                cells.append(f'<c r="{ref}"{style}><v>{value}</v></c>')
+            else:
+                text = escape(_ILLEGAL_XML_CHARS.sub('', str(value)))
+                cells.append(f'<c r="{ref}"{style} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+        return f'<row r="{row_num}">{"".join(cells)}</row>'
+
+    def _styles_xml(self):
+        """Default style plus one bold, filled header style per sheet"""
+        fonts = ['<font><sz val="11"/><name val="Calibri"/></font>']
+        fills = ['<fill><patternFill patternType="none"/></fill>',
+                 '<fill><patternFill patternType="gray125"/></fill>']
+        xfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+        for fill_color, font_color, centered in self._header_styles:
+            fonts.append(f'<font><b/><sz val="11"/><color rgb="00{font_color}"/><name val="Calibri"/></font>')
+            fills.append(f'<fill><patternFill patternType="solid"><fgColor rgb="00{fill_color}"/>'
+                         f'<bgColor rgb="00{fill_color}"/></patternFill></fill>')
+            if centered:
+                alignment = ' applyAlignment="1"><alignment horizontal="center"/></xf>'
+            else:
+                alignment = '/>'
+            xfs.append(f'<xf numFmtId="0" fontId="{len(fonts) - 1}" fillId="{len(fills) - 1}" borderId="0" xfId="0" '
+                       f'applyFont="1" applyFill="1"{alignment}')
+        return (
+            f'{_XML_DECL}<styleSheet xmlns="{_MAIN_NS}">'
+            f'<fonts count="{len(fonts)}">{"".join(fonts)}</fonts>'
+            f'<fills count="{len(fills)}">{"".join(fills)}</fills>'
+            '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+            '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+            f'<cellXfs count="{len(xfs)}">{"".join(xfs)}</cellXfs>'
+            '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+            '</styleSheet>'
+        )
 
+    def close(self):
+        """Write the workbook parts that reference the sheets and close the archive"""
+        count = len(self._sheets)
+        overrides = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in range(1, count + 1)
+        )
+        self._zip.writestr('[Content_Types].xml', (
+            f'{_XML_DECL}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'
+        ))
+        self._zip.writestr('_rels/.rels', (
+            f'{_XML_DECL}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        sheets = ''.join(
+            f'<sheet name={quoteattr(title)} sheetId="{n}" r:id="rId{n}"/>'
+            for n, title in enumerate(self._sheets, 1)
+        )
+        self._zip.writestr('xl/workbook.xml', (
+            f'{_XML_DECL}<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+            f'<sheets>{sheets}</sheets></workbook>'
+        ))
+        rels = ''.join(
+            f'<Relationship Id="rId{n}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{n}.xml"/>'
+            for n in range(1, count + 1)
+        )
+        self._zip.writestr('xl/_rels/workbook.xml.rels', (
+            f'{_XML_DECL}<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{rels}<Relationship Id="rId{count + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+            '</Relationships>'
+        ))
+        self._zip.writestr('xl/styles.xml', self._styles_xml())
+        self._zip.close()
+
+# Header styles per sheet: (fill color, font color, centered)
+SUMMARY_HEADER_STYLE = ("4472C4", "FFFFFF", True)
+KEY_VALUES_HEADER_STYLE = ("70AD47", "FFFFFF", False)
+FULL_TEXT_HEADER_STYLE = ("FFC000", "000000", False)
+TABLES_HEADER_STYLE = ("E74856", "FFFFFF", False)
+
+def create_summary_sheet(writer, results):
+    """Create summary sheet with high-level info"""
     # Headers
     headers = ['Source File', 'Batch', 'Processed Time', 'Text Blocks', 'Key-Value Pairs', 'Tables', 'Text Preview']
-    ws.append(headers)
-
-    # Style headers
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
 
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(1, col)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center')
-
-    # Data rows
+    # Build data rows and track column widths in the same pass; column
+    # widths are written before the first row, so they must be known first
+    widths = [len(h) for h in headers]
+    rows = []
     for result in results:
         text_preview = result['full_text'][:200] + '...' if len(result['full_text']) > 200 else result['full_text']
-        ws.append([
+        row = (
             result['source_file'],
             result['batch'],
             result['processed_time'],
@@ -83,121 +275,75 @@ def create_summary_sheet(wb, results):
             result['stats']['kv_pairs'],
             result['stats']['tables'],
             text_preview
-        ])
+        )
+        for i, value in enumerate(row):
+            widths[i] = max(widths[i], len(str(value)))
+        rows.append(row)
 
     # Auto-size columns
-    for col in range(1, len(headers) + 1):
-        column_letter = get_column_letter(col)
-        max_length = max(
-            len(str(ws.cell(row, col).value or ''))
-            for row in range(1, ws.max_row + 1)
-        )
-        ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
+    widths = [min(width + 2, 50) for width in widths]
 
-def create_key_values_sheet(wb, results):
-    """Create sheet with all key-value pairs"""
-    ws = wb.create_sheet("Key-Value Pairs")
+    writer.add_sheet("Summary", headers, widths, rows, SUMMARY_HEADER_STYLE)
 
+def create_key_values_sheet(writer, results):
+    """Create sheet with all key-value pairs"""
     # Headers
     headers = ['Source File', 'Batch', 'Key', 'Value', 'Confidence']
-    ws.append(headers)
-
-    # Style headers
-    header_fill = PatternFill(start_color="70AD47", end_color="70AD47", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(1, col)
-        cell.fill = header_fill
-        cell.font = header_font
 
     # Data rows
-    for result in results:
-        for kv in result['key_value_pairs']:
-            ws.append([
-                result['source_file'],
-                result['batch'],
-                kv.get('key', ''),
-                kv.get('value', ''),
-                round(kv.get('confidence', 0), 2)
-            ])
+    rows = (
+        (
+            result['source_file'],
+            result['batch'],
+            kv.get('key', ''),
+            kv.get('value', ''),
+            round(kv.get('confidence', 0), 2)
+        )
+        for result in results
+        for kv in result['key_value_pairs']
+    )
 
-    # Auto-size columns
-    for col in range(1, len(headers) + 1):
-        column_letter = get_column_letter(col)
-        ws.column_dimensions[column_letter].width = 30
+    writer.add_sheet("Key-Value Pairs", headers, [30] * len(headers), rows, KEY_VALUES_HEADER_STYLE)
 
-def create_full_text_sheet(wb, results):
+def create_full_text_sheet(writer, results):
     """Create sheet with full extracted text"""
-    ws = wb.create_sheet("Full Text")
-
     # Headers
     headers = ['Source File', 'Batch', 'Full Text']
-    ws.append(headers)
-
-    # Style headers
-    header_fill = PatternFill(start_color="FFC000", end_color="FFC000", fill_type="solid")
-    header_font = Font(bold=True, color="000000")
-
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(1, col)
-        cell.fill = header_fill
-        cell.font = header_font
 
     # Data rows
-    for result in results:
-        ws.append([
-            result['source_file'],
-            result['batch'],
-            result['full_text']
-        ])
+    rows = (
+        (result['source_file'], result['batch'], result['full_text'])
+        for result in results
+    )
 
-    # Set column widths
-    ws.column_dimensions['A'].width = 40
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 100
+    writer.add_sheet("Full Text", headers, [40, 15, 100], rows, FULL_TEXT_HEADER_STYLE)
 
-def create_tables_sheet(wb, results):
+def create_tables_sheet(writer, results):
     """Create sheet with extracted tables"""
-    ws = wb.create_sheet("Tables")
-
     # Headers
     headers = ['Source File', 'Batch', 'Table Number', 'Table Data (JSON)', 'Confidence']
-    ws.append(headers)
-
-    # Style headers
-    header_fill = PatternFill(start_color="E74856", end_color="E74856", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-
-    for col in range(1, len(headers) + 1):
-        cell = ws.cell(1, col)
-        cell.fill = header_fill
-        cell.font = header_font
 
     # Data rows
-    for result in results:
-        for idx, table in enumerate(result['tables'], 1):
-            # Convert table rows to readable format
-            table_text = '\n'.join([' | '.join(row) for row in table.get('rows', [])])
-
-            ws.append([
-                result['source_file'],
-                result['batch'],
-                idx,
-                table_text,
-                round(table.get('confidence', 0), 2)
-            ])
-
-    # Set column widths
-    ws.column_dimensions['A'].width = 40
-    ws.column_dimensions['B'].width = 15
-    ws.column_dimensions['C'].width = 12
-    ws.column_dimensions['D'].width = 80
-    ws.column_dimensions['E'].width = 12
+    def rows():
+        for result in results:
+            for idx, table in enumerate(result['tables'], 1):
+                # Convert table rows to readable format
+                table_text = '\n'.join(map(' | '.join, table.get('rows', ())))
+
+                yield (
+                    result['source_file'],
+                    result['batch'],
+                    idx,
+                    table_text,
+                    round(table.get('confidence', 0), 2)
+                )
+
+    writer.add_sheet("Tables", headers, [40, 15, 12, 80, 12], rows(), TABLES_HEADER_STYLE)
 
 def main():
     results_dir = Path('../textract_results')
     output_xlsx = '../textract_results.xlsx'
+    cache_path = '../.textract_results.cache.pkl'
 
     if not results_dir.exists():
         print("Error: textract_results directory not found!")
@@ -205,7 +351,7 @@ def main():
         return
 
     # Find all JSON files
-    json_files = list(results_dir.rglob('*.json'))
+    json_files = list(iter_json_files(results_dir))
 
     if not json_files:
         print("No JSON files found in textract_results/")
@@ -213,16 +359,40 @@ def main():
 
     print(f"Processing {len(json_files)} JSON files...")
 
-    # Process all files
-    results = []
-    for idx, json_file in enumerate(json_files, 1):
-        try:
-            result = process_json_file(json_file)
-            results.append(result)
-            if idx % 50 == 0:
-                print(f"  Processed {idx}/{len(json_files)} files...")
-        except Exception as e:
-            print(f"Error processing {json_file}: {e}")
+    # Reuse results for files unchanged since the last run (same mtime and size)
+    cache = load_cache(cache_path)
+    new_cache = {}
+    slots = [None] * len(json_files)
+    pending = []
+    for i, key in enumerate(json_files):
+        st = os.stat(key)
+        cached = cache.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            slots[i] = cached[2]
+            new_cache[key] = cached
+        else:
+            pending.append((i, key, st))
+
+    if len(pending) < len(json_files):
+        print(f"  {len(json_files) - len(pending)} files unchanged, reusing cached results")
+
+    # Process the remaining files across CPU cores (JSON decoding is CPU-bound);
+    # chunksize amortizes the inter-process overhead per file
+    if pending:
+        with ProcessPoolExecutor() as executor:
+            paths = [key for _, key, _ in pending]
+            for idx, ((i, key, st), result) in enumerate(zip(pending, executor.map(_safe_process, paths, chunksize=16)), 1):
+                if result is not None:
+                    slots[i] = result
+                    new_cache[key] = (st.st_mtime_ns, st.st_size, result)
+                if idx % 50 == 0:
+                    print(f"  Processed {idx}/{len(pending)} files...")
+
+    # Rewrite the cache when files were processed or removed
+    if pending or new_cache.keys() != cache.keys():
+        save_cache(cache_path, new_cache)
+
+    results = [result for result in slots if result is not None]
 
     if not results:
         print("No results to write!")
@@ -230,24 +400,19 @@ def main():
 
     print(f"\nCreating Excel workbook with {len(results)} documents...")
 
-    # Create workbook
-    wb = Workbook()
-
-    # Create sheets
-    print("  Creating Summary sheet...")
-    create_summary_sheet(wb, results)
-
-    print("  Creating Key-Value Pairs sheet...")
-    create_key_values_sheet(wb, results)
+    # Stream each sheet straight into the xlsx archive
+    with _XlsxStreamWriter(output_xlsx) as writer:
+        print("  Creating Summary sheet...")
+        create_summary_sheet(writer, results)
 
-    print("  Creating Full Text sheet...")
-    create_full_text_sheet(wb, results)
+        print("  Creating Key-Value Pairs sheet...")
+        create_key_values_sheet(writer, results)
 
-    print("  Creating Tables sheet...")
-    create_tables_sheet(wb, results)
+        print("  Creating Full Text sheet...")
+        create_full_text_sheet(writer, results)
 
-    # Save workbook
-    wb.save(output_xlsx)
+        print("  Creating Tables sheet...")
+        create_tables_sheet(writer, results)
 
     print(f"\n✓ Excel file created: {output_xlsx}")
     print(f"\nWorkbook contains:")
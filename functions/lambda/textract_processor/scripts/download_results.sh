@@ -30,7 +30,8 @@ echo ""
 # Create output directory
 mkdir -p "$OUTPUT_DIR"
 
-# Download all processed JSON files
+# Download all processed JSON files (gzip-compressed .json.gz from the
+# result processor and the recovery script, plain .json from older runs)
 echo "Downloading all JSON results..."
 aws s3 sync \
     s3://$OUTPUT_BUCKET/$OUTPUT_PREFIX \
@@ -38,21 +39,22 @@ aws s3 sync \
     --profile $AWS_PROFILE \
     --region $AWS_REGION \
     --exclude "*" \
-    --include "*.json"
+    --include "*.json" \
+    --include "*.json.gz"
 
-# Count files
-TOTAL_FILES=$(find "$OUTPUT_DIR" -name "*.json" | wc -l | tr -d ' ')
+# Count files (current .json.gz results plus any .json left by older runs)
+TOTAL_FILES=$(find "$OUTPUT_DIR" \( -name "*.json" -o -name "*.json.gz" \) | wc -l | tr -d ' ')
 
 echo ""
 echo "====================================================================="
 echo "✓ Download Complete!"
 echo "====================================================================="
 echo ""
-echo "Downloaded: $TOTAL_FILES JSON files"
+echo "Downloaded: $TOTAL_FILES JSON files (.json.gz, plus .json from older runs)"
 echo "Location: $OUTPUT_DIR"
 echo ""
 echo "Next steps:"
-echo "  1. Install dependencies: pip install boto3 openpyxl"
+echo "  1. Optional: pip install orjson (faster JSON parsing)"
 echo "  2. Run: python3 ./scripts/convert_to_xlsx.py - Convert to Excel format"
 echo "  3. Import textract_results.xlsx to Google Sheets or n8n"
 echo ""
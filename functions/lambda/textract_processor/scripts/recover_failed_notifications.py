@@ -6,58 +6,132 @@ and processes them manually.
 """
 
 import boto3
+import gzip
 import json
-from datetime import datetime
+import os
+import sys
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_env_file(path):
+    """
+    Export KEY=VALUE lines from the .env file the shell scripts source,
+    without overriding variables already set in the environment.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            # Drop trailing "  # comment" like the shell does
+            value = value.split(' #', 1)[0].strip().strip('"\'')
+            os.environ.setdefault(key.strip(), value)
+
+# Same settings (output bucket/prefix, region, table) as the Lambdas
+load_env_file(os.path.join(SCRIPT_DIR, '..', '.env'))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..'))
+import config
+
+# Recovery jobs are I/O-bound, run this many at once (keep under Textract's
+# GetDocumentAnalysis TPS limit)
+MAX_WORKERS = 16
+
+# GSI on Status created by 01_create_infrastructure.sh
+STATUS_INDEX = 'StatusIndex'
+
+# Connection pool sized above MAX_WORKERS, adaptive retries to back off on
+# throttling, and TCP keepalive so pooled connections are reused
+client_config = Config(
+    max_pool_connections=64,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+    tcp_keepalive=True
+)
+
+# AWS clients (shared by all worker threads)
+textract = boto3.client('textract', region_name=config.AWS_REGION, config=client_config)
+s3 = boto3.client('s3', region_name=config.AWS_REGION, config=client_config)
+dynamodb = boto3.resource('dynamodb', region_name=config.AWS_REGION, config=client_config)
+table = dynamodb.Table(config.DYNAMODB_TABLE_NAME)
+
+def iter_result_pages(job_id, result):
+    """
+    Yield the Blocks of each GetDocumentAnalysis page, starting with the
+    already fetched first result. Textract has no boto3 paginator for this call.
+    """
+    while True:
+        yield result['Blocks']
+        if 'NextToken' not in result:
+            return
+        result = textract.get_document_analysis(
+            JobId=job_id,
+            NextToken=result['NextToken']
+        )
 
-# AWS clients
-textract = boto3.client('textract', region_name='us-east-1')
-s3 = boto3.client('s3', region_name='us-east-1')
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
-table = dynamodb.Table('textract-jobs')
+def parse_textract_response(pages):
+    """Extract data from an iterable of Textract block pages; returns (extracted, total_blocks)"""
+    # Group the blocks this parser uses by BlockType in one pass (a single
+    # dict lookup per block); every other type is skipped
+    groups = {'LINE': [], 'WORD': [], 'KEY_VALUE_SET': []}
+    total_blocks = 0
+    for blocks in pages:
+        total_blocks += len(blocks)
+        for block in blocks:
+            group = groups.get(block['BlockType'])
+            if group is not None:
+                group.append(block)
 
-def parse_textract_response(blocks):
-    """Extract data from Textract blocks"""
     extracted = {
-        'raw_text': [],
+        'raw_text': [
+            {'text': block['Text'], 'confidence': block['Confidence']}
+            for block in groups['LINE']
+        ],
         'key_value_pairs': [],
         'tables': []
     }
 
-    block_map = {block['Id']: block for block in blocks}
+    word_text = {block['Id']: block['Text'] for block in groups['WORD']}
+    kv_blocks = {block['Id']: block for block in groups['KEY_VALUE_SET']}
+
+    # Text of each KEY/VALUE block, resolved once from its CHILD words
+    child_text = {
+        block_id: get_text_from_relationship(block, word_text)
+        for block_id, block in kv_blocks.items()
+    }
+
+    for block_id, block in kv_blocks.items():
+        if 'KEY' in block.get('EntityTypes', ()):
+            value_block = get_value_block(block, kv_blocks)
 
-    for block in blocks:
-        if block['BlockType'] == 'LINE':
-            extracted['raw_text'].append({
-                'text': block['Text'],
+            extracted['key_value_pairs'].append({
+                'key': child_text[block_id],
+                'value': child_text[value_block['Id']] if value_block else '',
                 'confidence': block['Confidence']
             })
-        elif block['BlockType'] == 'KEY_VALUE_SET':
-            if 'KEY' in block.get('EntityTypes', []):
-                key_text = get_text_from_relationship(block, block_map)
-                value_block = get_value_block(block, block_map)
-                value_text = get_text_from_relationship(value_block, block_map) if value_block else ''
-
-                extracted['key_value_pairs'].append({
-                    'key': key_text,
-                    'value': value_text,
-                    'confidence': block['Confidence']
-                })
-
-    return extracted
-
-def get_text_from_relationship(block, block_map):
-    """Helper to extract text from CHILD relationships"""
-    if not block:
-        return ''
-    text = ''
-    if 'Relationships' in block:
-        for relationship in block['Relationships']:
-            if relationship['Type'] == 'CHILD':
-                for child_id in relationship['Ids']:
-                    child = block_map.get(child_id)
-                    if child and child['BlockType'] == 'WORD':
-                        text += child['Text'] + ' '
-    return text.strip()
+
+    return extracted, total_blocks
+
+def get_text_from_relationship(block, word_text):
+    """Helper to join the WORD text of a block's CHILD relationships"""
+    return ' '.join(
+        word_text[child_id]
+        for relationship in block.get('Relationships', [])
+        if relationship['Type'] == 'CHILD'
+        for child_id in relationship['Ids']
+        if child_id in word_text
+    )
 
 def get_value_block(key_block, block_map):
     """Helper to find VALUE block for a KEY"""
@@ -69,33 +143,30 @@ def get_value_block(key_block, block_map):
     return None
 
 def recover_job(job_data):
-    """Attempt to recover a single job"""
+    """
+    Attempt to recover a single job.
+    Returns the updated DynamoDB item on success (the caller writes it,
+    since batch_writer is not thread-safe), or None.
+    """
     job_id = job_data['JobId']
+    label = job_id[:16]
 
     try:
         # Check Textract status
-        print(f"  Checking job {job_id[:16]}...")
         result = textract.get_document_analysis(JobId=job_id)
 
         status = result['JobStatus']
 
         if status != 'SUCCEEDED':
-            print(f"    Status: {status} - Skipping")
-            return False
-
-        print(f"    Status: SUCCEEDED - Recovering...")
+            print(f"  {label}... Status: {status} - Skipping")
+            return None
 
-        # Get all blocks (handle pagination)
-        blocks = result['Blocks']
-        while 'NextToken' in result:
-            result = textract.get_document_analysis(
-                JobId=job_id,
-                NextToken=result['NextToken']
-            )
-            blocks.extend(result['Blocks'])
+        # Parse data, consuming the paginated blocks as they are fetched
+        extracted_data, total_blocks = parse_textract_response(iter_result_pages(job_id, result))
 
-        # Parse data
-        extracted_data = parse_textract_response(blocks)
+        # One timestamp for the result metadata and the DynamoDB record, in the
+        # same naive UTC ISO format the Lambdas write
+        processed_time = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
 
         # Add metadata
         extracted_data['metadata'] = {
@@ -103,39 +174,36 @@ def recover_job(job_data):
             'bucket': job_data['Bucket'],
             'batch': job_data['BatchPrefix'],
             'job_id': job_id,
-            'processed_time': datetime.utcnow().isoformat(),
-            'total_blocks': len(blocks),
+            'processed_time': processed_time,
+            'total_blocks': total_blocks,
             'recovered': True
         }
 
-        # Save to S3
-        filename = job_data['SourceKey'].split('/')[-1].replace('.pdf', '.json')
-        output_key = f"processed/{job_data['BatchPrefix']}{filename}"
+        # Save to S3 with the same key and format as lambda_result_processor,
+        # so a late notification overwrites this object instead of adding one
+        filename = job_data['SourceKey'].split('/')[-1].replace('.pdf', '.json.gz')
+        output_key = config.get_output_key(job_data['BatchPrefix'], filename)
 
         s3.put_object(
-            Bucket=job_data['Bucket'],
+            Bucket=config.OUTPUT_BUCKET,
             Key=output_key,
-            Body=json.dumps(extracted_data, indent=2),
-            ContentType='application/json'
+            Body=dumps_result(extracted_data),
+            ContentType='application/json',
+            ContentEncoding='gzip'
         )
 
-        # Update DynamoDB
-        table.update_item(
-            Key={'JobId': job_id},
-            UpdateExpression='SET #status = :status, OutputKey = :output, CompletedTime = :time',
-            ExpressionAttributeNames={'#status': 'Status'},
-            ExpressionAttributeValues={
-                ':status': 'COMPLETED',
-                ':output': output_key,
-                ':time': datetime.utcnow().isoformat()
-            }
-        )
+        print(f"  {label}... ✓ Recovered: {output_key}")
 
-        print(f"    ✓ Recovered: {output_key}")
-        return True
+        # Full item so main() can put it through BatchWriteItem
+        return {
+            **job_data,
+            'Status': 'COMPLETED',
+            'OutputKey': output_key,
+            'CompletedTime': processed_time
+        }
 
     except textract.exceptions.InvalidJobIdException:
-        print(f"    Job expired (>7 days) - Cannot recover")
+        print(f"  {label}... Job expired (>7 days) - Cannot recover")
         # Mark as FAILED in DynamoDB
         table.update_item(
             Key={'JobId': job_id},
@@ -143,10 +211,42 @@ def recover_job(job_data):
             ExpressionAttributeNames={'#status': 'Status'},
             ExpressionAttributeValues={':status': 'FAILED_EXPIRED'}
         )
-        return False
+        return None
     except Exception as e:
-        print(f"    Error: {e}")
-        return False
+        print(f"  {label}... Error: {e}")
+        return None
+
+def dumps_result(extracted_data):
+    """Serialize extracted data as gzip-compressed compact JSON (as lambda_result_processor does)"""
+    if orjson is not None:
+        payload = orjson.dumps(extracted_data)
+    else:
+        payload = json.dumps(extracted_data, separators=(',', ':')).encode('utf-8')
+    return gzip.compress(payload, compresslevel=1)
+
+def find_in_progress_jobs():
+    """
+    Return all IN_PROGRESS job items, querying the Status GSI.
+    Falls back to a filtered scan for tables created before the index existed.
+    """
+    client = table.meta.client
+    try:
+        pages = client.get_paginator('query').paginate(
+            TableName=table.name,
+            IndexName=STATUS_INDEX,
+            KeyConditionExpression=Key('Status').eq('IN_PROGRESS')
+        )
+        return [item for page in pages for item in page['Items']]
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ValidationException':
+            raise
+        print(f"  {STATUS_INDEX} not found - falling back to a full table scan")
+
+    pages = client.get_paginator('scan').paginate(
+        TableName=table.name,
+        FilterExpression=Attr('Status').eq('IN_PROGRESS')
+    )
+    return [item for page in pages for item in page['Items']]
 
 def main():
     print("=" * 70)
@@ -154,25 +254,9 @@ def main():
     print("=" * 70)
     print()
 
-    # Scan for IN_PROGRESS jobs
-    print("Scanning DynamoDB for IN_PROGRESS jobs...")
-    response = table.scan(
-        FilterExpression='#s = :status',
-        ExpressionAttributeNames={'#s': 'Status'},
-        ExpressionAttributeValues={':status': 'IN_PROGRESS'}
-    )
-
-    jobs = response['Items']
-
-    # Handle pagination
-    while 'LastEvaluatedKey' in response:
-        response = table.scan(
-            FilterExpression='#s = :status',
-            ExpressionAttributeNames={'#s': 'Status'},
-            ExpressionAttributeValues={':status': 'IN_PROGRESS'},
-            ExclusiveStartKey=response['LastEvaluatedKey']
-        )
-        jobs.extend(response['Items'])
+    # Find IN_PROGRESS jobs
+    print("Querying DynamoDB for IN_PROGRESS jobs...")
+    jobs = find_in_progress_jobs()
 
     print(f"Found {len(jobs)} IN_PROGRESS jobs")
     print()
@@ -194,16 +278,20 @@ def main():
     recovered = 0
     failed = 0
 
-    for idx, job_data in enumerate(jobs, 1):
-        print(f"[{idx}/{len(jobs)}] Processing...")
-        if recover_job(job_data):
-            recovered += 1
-        else:
-            failed += 1
+    with table.batch_writer() as bw, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(recover_job, job_data) for job_data in jobs]
+
+        for idx, future in enumerate(as_completed(futures), 1):
+            item = future.result()
+            if item:
+                bw.put_item(Item=item)
+                recovered += 1
+            else:
+                failed += 1
 
-        # Progress update every 50 jobs
-        if idx % 50 == 0:
-            print(f"\n  Progress: {idx}/{len(jobs)} | Recovered: {recovered} | Failed: {failed}\n")
+            # Progress update every 50 jobs
+            if idx % 50 == 0:
+                print(f"\n  Progress: {idx}/{len(jobs)} | Recovered: {recovered} | Failed: {failed}\n")
 
     print()
     print("=" * 70)